@@ -15,7 +15,18 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import concurrent.futures
+import os
+
+import bmesh
 import bpy
+import numpy as np
+
+# numba is optional, the NumPy implementation is used when it isn't installed
+try:
+    import numba
+except ImportError:
+    numba = None
 
 bl_info = {
     "name":        "Tension Map Script",
@@ -31,31 +42,58 @@ bl_info = {
 }
 
 last_processed_frame = None
-number_of_tm_channels = 2
-# list of modifiers that we will keep to compute the deformation
+# set of modifiers that we will keep to compute the deformation
 # TODO: update based on list in docs
 # https://docs.blender.org/api/blender2.8/bpy.types.Modifier.html#bpy.types.Modifier.type
-kept_modifiers = ["ARMATURE", "MESH_CACHE", "CAST", "CURVE", "HOOK",
-                  "LAPLACIANSMOOTH", "LAPLACIANDEFORM",
-                  "LATTICE", "MESH_DEFORM", "SHRINKWRAP", "SIMPLE_DEFORM",
-                  "SMOOTH", "WARP", "WAVE", "CLOTH",
-                  "SOFT_BODY"]
+kept_modifiers = frozenset(["ARMATURE", "MESH_CACHE", "CAST", "CURVE", "HOOK",
+                            "LAPLACIANSMOOTH", "LAPLACIANDEFORM",
+                            "LATTICE", "MESH_DEFORM", "SHRINKWRAP", "SIMPLE_DEFORM",
+                            "SMOOTH", "WARP", "WAVE", "CLOTH",
+                            "SOFT_BODY"])
 
 tm_update_modes = ["OBJECT", "WEIGHT_PAINT", "VERTEX_PAINT"]
 
+# generic mesh attributes only exist since Blender 2.91
+use_attributes = bpy.app.version >= (2, 91, 0)
+# Blender 3.2 replaced vertex colors by color attributes
+use_color_attributes = bpy.app.version >= (3, 2, 0)
+# their "color_srgb" only exists since Blender 3.4, and stores the values as they are,
+# like the "color" of vertex colors used to
+# on 3.2 and 3.3 their "color" is converted from linear to sRGB when stored, which is accepted:
+# the shaders then read back the exact tension, instead of the tension taken as an sRGB value
+use_color_srgb = use_color_attributes \
+    and "color_srgb" in bpy.types.ByteColorAttributeValue.bl_rna.properties
+vertex_colors_property = "color_srgb" if use_color_srgb else "color"
+
+# names of the objects with tension map activated, to avoid looping over all objects in the scene
+# it is set to None when it needs to be found again from the scene
+tm_active_objects = None
+tm_active_objects_signature = None
+
+# rest edge lengths and topology of every mesh, indexed by get_mesh_key
+rest_data_per_mesh = {}
+# scratch buffers of every mesh, indexed by get_mesh_key
+buffers_per_mesh = {}
+# number of meshes kept in each of the caches above, enough for crowd scenes
+# the deleted meshes are forgotten first, then the least recently used ones
+max_cached_meshes = 4096
+# threads computing the tension maps of several objects at once, created when first needed
+tm_executor = None
+
 
 def get_or_create_vertex_group(obj, group_name):
     """
-    Creates a new vertex group and initializes it only if it doesn't exist then returns it
+    Creates a new vertex group only if it doesn't exist then returns it
+    It is left empty, as set_vertex_groups_weights assigns every vertex to it
     :param obj: the object to operate on
     :param group_name: the name of the group to get or create
     :return: the the vertex group
     """
-    if group_name not in obj.vertex_groups:
-        obj.vertex_groups.new(name=group_name)
-        for i in range(len(obj.data.vertices)):
-            obj.vertex_groups[group_name].add([i], 0.0, "REPLACE")
-    return obj.vertex_groups[group_name]
+    # get() looks the name up once, where a test followed by an index would look it up twice
+    group = obj.vertex_groups.get(group_name)
+    if group is None:
+        group = obj.vertex_groups.new(name=group_name)
+    return group
 
 
 def get_or_create_vertex_colors(obj, colors_name):
@@ -65,139 +103,726 @@ def get_or_create_vertex_colors(obj, colors_name):
     :param colors_name: the name of the colors data to get or create
     :return: the vertex colors
     """
-    if colors_name not in obj.data.vertex_colors:
-        obj.data.vertex_colors.new(name=colors_name)
-    return obj.data.vertex_colors[colors_name]
+    if use_color_attributes:
+        colors = obj.data.color_attributes.get(colors_name)
+        if colors is None:
+            # explicitly stored as bytes, one per channel
+            colors = obj.data.color_attributes.new(name=colors_name, type="BYTE_COLOR", domain="CORNER")
+        return colors
 
+    colors = obj.data.vertex_colors.get(colors_name)
+    if colors is None:
+        colors = obj.data.vertex_colors.new(name=colors_name)
+    return colors
 
-def tm_update(obj, context):
+
+def get_or_create_attribute(obj, attribute_name):
     """
-    Updates the tension map for the given object
-    :param obj: the object to update
+    Creates a new float attribute on the vertices only if it doesn't exist then returns it
+    :param obj: the object to operate on
+    :param attribute_name: the name of the attribute to get or create
+    :return: the attribute
+    """
+    attribute = obj.data.attributes.get(attribute_name)
+    if attribute is None:
+        attribute = obj.data.attributes.new(name=attribute_name, type="FLOAT", domain="POINT")
+    return attribute
+
+
+def set_vertex_groups_weights(obj, weights_per_group):
+    """
+    Replaces the weight of every vertex in the given vertex groups at once
+    This goes through the deform layer of a bmesh instead of calling VertexGroup.add for every vertex
+    :param obj: the object to operate on
+    :param weights_per_group: a dict mapping vertex group indices to arrays with one weight per vertex
+    :return: nothing
+    """
+    groups = [(group_index, weights.tolist())
+              for group_index, weights in weights_per_group.items()]
+
+    bm = bmesh.new()
+    bm.from_mesh(obj.data)
+    deform_layer = bm.verts.layers.deform.verify()
+
+    for i, vertex in enumerate(bm.verts):
+        vertex_weights = vertex[deform_layer]
+        for group_index, weights in groups:
+            vertex_weights[group_index] = weights[i]
+
+    bm.to_mesh(obj.data)
+    bm.free()
+
+
+def get_array(collection, attribute, width=1, dtype=np.int32):
+    """
+    Reads an attribute of every item of a collection into a contiguous array
+    :param collection: the bpy collection to read, like mesh.edges
+    :param attribute: the name of the attribute to read
+    :param width: the number of values per item
+    :param dtype: the type of the values
+    :return: a (items, width) array, or a flat array if width is 1
+    """
+    array = np.empty(len(collection) * width, dtype=dtype)
+    collection.foreach_get(attribute, array)
+    return array if width == 1 else array.reshape(-1, width)
+
+
+def compute_edge_lengths(coords, edge_vertices):
+    """
+    Computes the length of every edge
+    :param coords: the (vertices, 3) coordinates of the vertices
+    :param edge_vertices: the (edges, 2) indices of the two vertices of every edge
+    :return: the length of every edge
+    """
+    edge_vectors = coords[edge_vertices[:, 0]] - coords[edge_vertices[:, 1]]
+    # einsum sums the squared components without the temporary arrays of np.linalg.norm
+    return np.sqrt(np.einsum("ij,ij->i", edge_vectors, edge_vectors))
+
+
+def get_mesh_key(mesh):
+    """
+    Gets the key used to cache data about the given mesh
+    The session UID is never reused for another mesh, unlike the pointer once the mesh is freed,
+    but it only exists since Blender 2.91
+    :param mesh: the mesh to get the key of
+    :return: an integer identifying the mesh
+    """
+    session_uid = getattr(mesh, "session_uid", None)
+    return mesh.as_pointer() if session_uid is None else session_uid
+
+
+def get_cached_mesh_data(cache, mesh):
+    """
+    Gets data about the given mesh from one of the per-mesh caches
+    The entry is moved to the end of the cache, so that the first entries are the least recently used
+    :param cache: the dict to get the data from
+    :param mesh: the mesh the data is about
+    :return: the cached data, or None if there is none
+    """
+    key = get_mesh_key(mesh)
+    data = cache.pop(key, None)
+    if data is not None:
+        cache[key] = data
+    return data
+
+
+def cache_mesh_data(cache, mesh, data):
+    """
+    Stores data about the given mesh in one of the per-mesh caches
+    The caches are dicts, which keep their insertion order, so the first entries are the least
+    recently used ones
+    :param cache: the dict to store the data in
+    :param mesh: the mesh the data is about
+    :param data: the data to store
+    :return: nothing
+    """
+    key = get_mesh_key(mesh)
+    cache.pop(key, None)
+    if len(cache) >= max_cached_meshes:
+        # meshes that were deleted are never looked up again, forget them before the ones still in use
+        existing_keys = {get_mesh_key(existing_mesh) for existing_mesh in bpy.data.meshes}
+        for deleted_key in [cached_key for cached_key in cache if cached_key not in existing_keys]:
+            del cache[deleted_key]
+        while len(cache) >= max_cached_meshes:
+            del cache[next(iter(cache))]
+    cache[key] = data
+
+
+def get_buffers(mesh):
+    """
+    Gets the scratch buffers of the given mesh, reused from one frame to another
+    They are only allocated again when the number of vertices, edges or loops of the mesh has changed
+    :param mesh: the mesh to get the buffers of
+    :return: a dict of NumPy arrays
+    """
+    num_vertices = len(mesh.vertices)
+    num_edges = len(mesh.edges)
+    num_loops = len(mesh.loops)
+    size = (num_vertices, num_edges, num_loops)
+
+    buffers = get_cached_mesh_data(buffers_per_mesh, mesh)
+    if buffers is not None and buffers["size"] == size:
+        return buffers
+
+    colors = np.empty((num_loops, 4), dtype=np.float32)
+    # blue and alpha never change
+    colors[:, 2] = 0.0
+    colors[:, 3] = 1.0
+
+    buffers = {
+        "size": size,
+        "rest_coords": np.empty(num_vertices * 3, dtype=np.float32),
+        "deformed_coords": np.empty((num_vertices, 3), dtype=np.float32),
+        "weights": np.empty(num_vertices, dtype=np.float32),
+        "tension": np.empty((num_vertices, 2), dtype=np.float32),
+        "colors": colors,
+        # state of the last update, to skip the next one when nothing changed
+        "previous_coords": np.empty((num_vertices, 3), dtype=np.float32),
+        "previous_settings": None,
+        "previous_rest_data": None,
+        # intermediate values of the NumPy implementations
+        "scratch": {
+            "displacements": np.empty((num_vertices, 3), dtype=np.float32),
+            "edge_vectors": np.empty((num_edges, 3), dtype=np.float32),
+            "edge_coords": np.empty((num_edges, 3), dtype=np.float32),
+            "edge_factors": np.empty((num_edges, 2), dtype=np.float32)
+        }
+    }
+    cache_mesh_data(buffers_per_mesh, mesh, buffers)
+    return buffers
+
+
+def get_rest_data(mesh, coords):
+    """
+    Gets the topology and the rest edge lengths of the given mesh
+    They are cached and only computed again when the mesh has been edited since the last call
+    :param mesh: the mesh to get the rest data of
+    :param coords: a buffer to copy the rest coordinates of the vertices to
+    :return: a dict with the "coords", "edge_vertices", "loop_vertices", "edge_lengths"
+    and "edge_directions" of the mesh
+    """
+    num_vertices = len(mesh.vertices)
+    num_edges = len(mesh.edges)
+    signature = (num_vertices, num_edges, len(mesh.loops))
+
+    # the rest coordinates and the edges are cheap to copy, and are used to detect edits to the mesh
+    # edits like rotating an edge keep the counts and the coordinates, but not the edges
+    # and flipping normals only changes the order of the loops, so their vertices are compared too
+    mesh.vertices.foreach_get("co", coords)
+    unsorted_edge_vertices = get_array(mesh.edges, "vertices", 2)
+    loop_vertices = get_array(mesh.loops, "vertex_index")
+
+    rest_data = get_cached_mesh_data(rest_data_per_mesh, mesh)
+    if rest_data is not None and rest_data["signature"] == signature \
+            and np.array_equal(rest_data["coords"].ravel(), coords) \
+            and np.array_equal(rest_data["unsorted_edge_vertices"], unsorted_edge_vertices) \
+            and np.array_equal(rest_data["loop_vertices"], loop_vertices):
+        return rest_data
+
+    # the order of the edges doesn't matter, so sort them by their lowest vertex
+    # consecutive edges then accumulate into nearby weights, which is friendlier to the cache
+    edge_order = np.argsort(unsorted_edge_vertices.min(axis=1), kind="stable")
+    edge_vertices = unsorted_edge_vertices[edge_order]
+
+    rest_coords = coords.reshape(num_vertices, 3)
+    edge_lengths = compute_edge_lengths(rest_coords, edge_vertices)
+    # direction from the first to the second vertex of every edge, used by the linear approximation
+    # edges without length have no direction and are left at zero
+    edge_directions = rest_coords[edge_vertices[:, 1]] - rest_coords[edge_vertices[:, 0]]
+    np.divide(edge_directions, edge_lengths[:, np.newaxis], out=edge_directions,
+              where=edge_lengths[:, np.newaxis] > 0.0)
+
+    rest_data = {
+        "signature": signature,
+        "coords": rest_coords.copy(),
+        "unsorted_edge_vertices": unsorted_edge_vertices,
+        "edge_vertices": edge_vertices,
+        "loop_vertices": loop_vertices,
+        "edge_lengths": edge_lengths,
+        "edge_directions": edge_directions
+    }
+    cache_mesh_data(rest_data_per_mesh, mesh, rest_data)
+    return rest_data
+
+
+def compute_weights_numpy(original_edge_lengths, deformed_coords, edge_vertices, multiply, weights, scratch):
+    """
+    Computes the tension weight of every vertex using NumPy
+    All the intermediate values are computed in place in the scratch buffers, to avoid allocating them
+    :param original_edge_lengths: the length of every edge before deformation
+    :param deformed_coords: the (vertices, 3) coordinates of the vertices after deformation
+    :param edge_vertices: the (edges, 2) indices of the two vertices of every edge
+    :param multiply: the factor applied to the deformation of every edge
+    :param weights: the array to store the weight of every vertex in,
+    positive when stretched and negative when squeezed
+    :param scratch: the scratch buffers of the mesh
+    :return: nothing
+    """
+    edge_vectors = scratch["edge_vectors"]
+    edge_coords = scratch["edge_coords"]
+    edge_factors = scratch["edge_factors"]
+
+    np.take(deformed_coords, edge_vertices[:, 0], axis=0, out=edge_vectors)
+    np.take(deformed_coords, edge_vertices[:, 1], axis=0, out=edge_coords)
+    np.subtract(edge_vectors, edge_coords, out=edge_vectors)
+
+    # the factors are computed in the first column, then copied to the second one for the scatter
+    deformation_factors = edge_factors[:, 0]
+    np.einsum("ij,ij->i", edge_vectors, edge_vectors, out=deformation_factors)
+    np.sqrt(deformation_factors, out=deformation_factors)
+    np.subtract(original_edge_lengths, deformation_factors, out=deformation_factors)
+    deformation_factors *= multiply
+    accumulate_weights(edge_factors, edge_vertices, weights)
+
+
+def compute_weights_linear(rest_coords, edge_directions, deformed_coords, edge_vertices, multiply, weights,
+                           scratch):
+    """
+    Computes an approximation of the tension weight of every vertex using NumPy
+    The change of length of every edge is approximated by the displacement of its vertices
+    along its rest direction, which needs no square root and is accurate for small deformations
+    :param rest_coords: the (vertices, 3) coordinates of the vertices before deformation
+    :param edge_directions: the (edges, 3) normalized rest direction of every edge
+    :param deformed_coords: the (vertices, 3) coordinates of the vertices after deformation
+    :param edge_vertices: the (edges, 2) indices of the two vertices of every edge
+    :param multiply: the factor applied to the deformation of every edge
+    :param weights: the array to store the weight of every vertex in,
+    positive when stretched and negative when squeezed
+    :param scratch: the scratch buffers of the mesh
+    :return: nothing
+    """
+    displacements = scratch["displacements"]
+    edge_displacements = scratch["edge_vectors"]
+    edge_coords = scratch["edge_coords"]
+    edge_factors = scratch["edge_factors"]
+
+    np.subtract(deformed_coords, rest_coords, out=displacements)
+    np.take(displacements, edge_vertices[:, 1], axis=0, out=edge_displacements)
+    np.take(displacements, edge_vertices[:, 0], axis=0, out=edge_coords)
+    np.subtract(edge_displacements, edge_coords, out=edge_displacements)
+
+    # the edges get shorter when their vertices move towards each other
+    deformation_factors = edge_factors[:, 0]
+    np.einsum("ij,ij->i", edge_displacements, edge_directions, out=deformation_factors)
+    deformation_factors *= -multiply
+    accumulate_weights(edge_factors, edge_vertices, weights)
+
+
+def update_edge_factors(rest_data, deformed_coords, multiply, linear, changed_edges, edge_factors):
+    """
+    Computes again the deformation factor of some edges using NumPy,
+    the factors of the other edges being kept from the last computation
+    :param rest_data: the rest data of the mesh
+    :param deformed_coords: the (vertices, 3) coordinates of the vertices after deformation
+    :param multiply: the factor applied to the deformation of every edge
+    :param linear: whether to use the linear approximation
+    :param changed_edges: the indices of the edges to compute again
+    :param edge_factors: the (edges, 2) buffer with the deformation of every edge in its first column
+    :return: nothing
+    """
+    first_vertices = rest_data["edge_vertices"][changed_edges, 0]
+    second_vertices = rest_data["edge_vertices"][changed_edges, 1]
+
+    if linear:
+        rest_coords = rest_data["coords"]
+        edge_directions = rest_data["edge_directions"][changed_edges]
+        edge_displacements = (deformed_coords[second_vertices] - rest_coords[second_vertices]) - \
+                             (deformed_coords[first_vertices] - rest_coords[first_vertices])
+        factors = np.einsum("ij,ij->i", edge_displacements, edge_directions) * -multiply
+    else:
+        edge_vectors = deformed_coords[first_vertices] - deformed_coords[second_vertices]
+        deformed_edge_lengths = np.sqrt(np.einsum("ij,ij->i", edge_vectors, edge_vectors))
+        factors = (rest_data["edge_lengths"][changed_edges] - deformed_edge_lengths) * multiply
+
+    edge_factors[changed_edges, 0] = factors
+
+
+def accumulate_weights(edge_factors, edge_vertices, weights):
+    """
+    Sums the deformation factors of the edges of every vertex using NumPy
+    :param edge_factors: the (edges, 2) buffer with the deformation of every edge in its first column,
+    positive when squeezed
+    :param edge_vertices: the (edges, 2) indices of the two vertices of every edge
+    :param weights: the array to store the weight of every vertex in
+    :return: nothing
+    """
+    # store the weights by subtracting to overlay all the factors for each vertex
+    # both vertices of an edge are next to each other once flattened, so every factor is needed twice
+    # bincount sums them in a single pass, which is much faster than np.subtract.at
+    edge_factors[:, 1] = edge_factors[:, 0]
+    np.negative(np.bincount(edge_vertices.ravel(), weights=edge_factors.ravel(),
+                            minlength=weights.shape[0]), out=weights, casting="same_kind")
+
+
+if numba is not None:
+    # limits on the number of chunks the numba kernel splits the edges in
+    max_numba_chunks = 16
+    min_edges_per_numba_chunk = 16384
+
+    # the kernel is compiled once for the exact contiguous arrays the buffers and the rest data use,
+    # so numba doesn't have to find the types of the arguments again on every call
+    # the indices come from Blender and are always valid, and the numpy error model
+    # doesn't check for divisions by zero, which leaves the loops free of branches
+    @numba.njit("void(float32[::1], float32[:, ::1], int32[:, ::1], float32, float32[:, ::1], float32[::1])",
+                cache=True, parallel=True, fastmath=True, boundscheck=False, error_model="numpy")
+    def accumulate_weights_numba(original_edge_lengths, deformed_coords, edge_vertices, multiply,
+                                 partial_weights, weights):
+        """
+        Computes the tension weight of every vertex in a single compiled pass over the edges
+        The edges are split in chunks, each chunk accumulating in its own row,
+        so that no two threads ever write to the same weight
+        Only the range of vertices touched by a chunk is cleared and summed in its row
+        The edges are sorted by their lowest vertex, which usually keeps that range narrow on meshes
+        with local vertex numbering, but doesn't limit the highest vertex: a single edge between
+        distant vertices, like the seam of a cylinder, widens it to most of the mesh,
+        in which case it costs as much as clearing and summing the whole row
+        :param original_edge_lengths: the length of every edge before deformation
+        :param deformed_coords: the (vertices, 3) coordinates of the vertices after deformation
+        :param edge_vertices: the (edges, 2) indices of the two vertices of every edge
+        :param multiply: the factor applied to the deformation of every edge
+        :param partial_weights: the (chunks, vertices) buffer to accumulate every chunk in
+        :param weights: the array to store the weight of every vertex in,
+        positive when stretched and negative when squeezed
+        :return: nothing
+        """
+        num_chunks = partial_weights.shape[0]
+        num_vertices = deformed_coords.shape[0]
+        num_edges = edge_vertices.shape[0]
+        chunk_size = (num_edges + num_chunks - 1) // num_chunks
+        # range of the vertices touched by every chunk, empty chunks get an empty range
+        first_vertices = np.empty(num_chunks, dtype=np.int64)
+        last_vertices = np.empty(num_chunks, dtype=np.int64)
+
+        for chunk in numba.prange(num_chunks):
+            start = chunk * chunk_size
+            end = min(num_edges, start + chunk_size)
+
+            first_vertex = num_vertices
+            last_vertex = -1
+            for i in range(start, end):
+                first_vertex = min(first_vertex, edge_vertices[i, 0], edge_vertices[i, 1])
+                last_vertex = max(last_vertex, edge_vertices[i, 0], edge_vertices[i, 1])
+            first_vertices[chunk] = first_vertex
+            last_vertices[chunk] = last_vertex
+            partial_weights[chunk, first_vertex:last_vertex + 1] = 0.0
+
+            for i in range(start, end):
+                first_vertex = edge_vertices[i, 0]
+                second_vertex = edge_vertices[i, 1]
+
+                dx = deformed_coords[first_vertex, 0] - deformed_coords[second_vertex, 0]
+                dy = deformed_coords[first_vertex, 1] - deformed_coords[second_vertex, 1]
+                dz = deformed_coords[first_vertex, 2] - deformed_coords[second_vertex, 2]
+                deformed_edge_length = np.sqrt(dx * dx + dy * dy + dz * dz)
+
+                deformation_factor = (original_edge_lengths[i] - deformed_edge_length) * multiply
+                partial_weights[chunk, first_vertex] -= deformation_factor
+                partial_weights[chunk, second_vertex] -= deformation_factor
+
+        for i in numba.prange(num_vertices):
+            weight = 0.0
+            for chunk in range(num_chunks):
+                if first_vertices[chunk] <= i <= last_vertices[chunk]:
+                    weight += partial_weights[chunk, i]
+            weights[i] = weight
+
+    def compute_weights_numba(original_edge_lengths, deformed_coords, edge_vertices, multiply, weights, scratch):
+        """
+        Computes the tension weight of every vertex using numba, with at most one chunk of edges per thread
+        :param original_edge_lengths: the length of every edge before deformation
+        :param deformed_coords: the (vertices, 3) coordinates of the vertices after deformation
+        :param edge_vertices: the (edges, 2) indices of the two vertices of every edge
+        :param multiply: the factor applied to the deformation of every edge
+        :param weights: the array to store the weight of every vertex in,
+        positive when stretched and negative when squeezed
+        :param scratch: the scratch buffers of the mesh, where the partial weights of the chunks are kept
+        :return: nothing
+        """
+        # small meshes aren't worth splitting, and too many chunks only add rows to clear and sum
+        num_chunks = max(1, min(numba.get_num_threads(), max_numba_chunks,
+                                edge_vertices.shape[0] // min_edges_per_numba_chunk))
+        partial_weights = scratch.get("partial_weights")
+        if partial_weights is None or partial_weights.shape[0] != num_chunks:
+            partial_weights = np.empty((num_chunks, weights.shape[0]), dtype=np.float32)
+            scratch["partial_weights"] = partial_weights
+
+        accumulate_weights_numba(original_edge_lengths, deformed_coords, edge_vertices,
+                                 multiply, partial_weights, weights)
+
+    compute_weights = compute_weights_numba
+else:
+    compute_weights = compute_weights_numpy
+
+
+def read_deformed_coords(obj, context, deformed_coords):
+    """
+    Reads the coordinates of the vertices of the given object, deformed by the kept modifiers only
+    :param obj: the object to read
     :param context: the context of the operation
+    :param deformed_coords: the (vertices, 3) buffer to copy the coordinates to
     :return: nothing
     """
+    # temporarily hide the modifiers that we don't keep for the deformed mesh
+    # only the visible ones are touched, as every change of show_viewport
+    # makes the depsgraph evaluate the object again
+    # TODO: use a bool property on each modifier to determine if it should be kept
+    # it appears a property can't be added to the Modifier type
+    # another way will need to be found
+    hidden_modifiers = [modifier for modifier in obj.modifiers
+                        if modifier.show_viewport and modifier.type not in kept_modifiers]
+    for modifier in hidden_modifiers:
+        modifier.show_viewport = False
+
+    depsgraph = context.evaluated_depsgraph_get()
+    object_eval = obj.evaluated_get(depsgraph)
+    if hidden_modifiers:
+        # this converts the object to a mesh
+        # as it is currently visible in the viewport
+        deformed_mesh = object_eval.to_mesh()
+
+        # restore modifiers viewport show state
+        for modifier in hidden_modifiers:
+            modifier.show_viewport = True
+    else:
+        # optimization: when only kept modifiers are visible, the mesh already evaluated
+        # by the depsgraph is the deformed one, so there is no need to copy it
+        deformed_mesh = object_eval.data
+
+    # bulk copy the deformed coordinates into a contiguous buffer,
+    # to avoid going through Python for every edge
+    deformed_mesh.vertices.foreach_get("co", deformed_coords.ravel())
+
+    # delete the temporary deformed mesh
+    if hidden_modifiers:
+        object_eval.to_mesh_clear()
+
+
+def tm_read(obj, context, force=False):
+    """
+    Reads everything needed to compute the tension map of the given object from Blender
+    This has to run on the main thread, like all accesses to bpy
+    :param obj: the object to read
+    :param context: the context of the operation
+    :param force: whether to update the object even if nothing changed since its last update
+    :return: a dict with the data of the update, or None if the object doesn't need to be updated
+    """
     # only care about meshes
     if obj.type != "MESH":
-        return
+        return None
+
+    # optimization: bind everything used later to locals, to avoid going through RNA again
+    mesh = obj.data
+    modifiers = obj.modifiers
+    enable_vertex_groups = mesh.tm_enable_vertex_groups
+    enable_vertex_colors = mesh.tm_enable_vertex_colors
+    enable_attributes = use_attributes and mesh.tm_enable_attributes
 
     # only care about meshes with tensionmap activated
-    if not obj.data.tm_active:
-        return
+    if not mesh.tm_active:
+        return None
 
     # only care if some method of output is activated, to avoid overhead
-    if not obj.data.tm_enable_vertex_colors and not obj.data.tm_enable_vertex_groups:
-        return
+    if not enable_vertex_colors and not enable_vertex_groups and not enable_attributes:
+        return None
 
     # can't edit vertex group and so on when in other modes
     if obj.mode not in tm_update_modes:
-        return
+        return None
+
+    # the buffers are reused from one frame to another to avoid allocating them again
+    buffers = get_buffers(mesh)
+
+    # the rest edge lengths and the topology don't change from one frame to another
+    rest_data = get_rest_data(mesh, buffers["rest_coords"])
+
+    # optimization: without shape keys, parent or visible kept modifier, nothing can deform the mesh
+    # so it is at rest, and there is no need to evaluate it
+    # a parent is enough, as armature and lattice parents deform the mesh without a modifier
+    if mesh.shape_keys is None and obj.parent is None \
+            and not any(modifier.show_viewport and modifier.type in kept_modifiers for modifier in modifiers):
+        buffers["deformed_coords"][:] = rest_data["coords"]
+    else:
+        read_deformed_coords(obj, context, buffers["deformed_coords"])
+
+    update = {
+        "object": obj,
+        "buffers": buffers,
+        "rest_data": rest_data,
+        "multiply": mesh.tm_multiply,
+        "minimum": mesh.tm_minimum,
+        "maximum": mesh.tm_maximum,
+        "linear": mesh.tm_linear,
+        "enable_vertex_groups": enable_vertex_groups,
+        "enable_vertex_colors": enable_vertex_colors,
+        "enable_attributes": enable_attributes
+    }
+
+    # the result would be the same as last time if neither the deformation, the rest data nor a setting changed,
+    # which happens when the depsgraph is updated by something that doesn't move the mesh
+    settings = tuple(value for key, value in update.items() if key not in ("object", "buffers", "rest_data"))
+    previous_coords = buffers["previous_coords"]
+    update["changed_vertices"] = None
+    if not force and buffers["previous_settings"] == settings and buffers["previous_rest_data"] is rest_data:
+        changed_vertices = np.any(previous_coords != buffers["deformed_coords"], axis=1)
+        if not changed_vertices.any():
+            return None
+        # only the edges of the vertices that moved need to be computed again
+        update["changed_vertices"] = changed_vertices
+
+    buffers["previous_settings"] = settings
+    buffers["previous_rest_data"] = rest_data
+    previous_coords[:] = buffers["deformed_coords"]
+    return update
+
+
+def tm_compute(update):
+    """
+    Computes the tension map of an update read by tm_read
+    It only works on arrays and doesn't access bpy, so it can run on another thread
+    :param update: the data of the update
+    :return: nothing
+    """
+    buffers = update["buffers"]
+    rest_data = update["rest_data"]
+    edge_vertices = rest_data["edge_vertices"]
+    weights = buffers["weights"]
+    tension = buffers["tension"]
+
+    # the NumPy implementations leave the factor of every edge in the scratch buffers,
+    # so when only some vertices moved, only the factors of their edges need to be computed again
+    # the numba kernel doesn't store them, but it is fast enough to compute all of them every time
+    changed_edges = None
+    changed_vertices = update["changed_vertices"]
+    if changed_vertices is not None and (update["linear"] or numba is None):
+        changed_edges = np.flatnonzero(changed_vertices[edge_vertices[:, 0]] |
+                                       changed_vertices[edge_vertices[:, 1]])
+        # past half of the edges, selecting them costs more than computing all of them
+        if len(changed_edges) > len(edge_vertices) // 2:
+            changed_edges = None
+
+    if changed_edges is not None:
+        update_edge_factors(rest_data, buffers["deformed_coords"], update["multiply"], update["linear"],
+                            changed_edges, buffers["scratch"]["edge_factors"])
+        accumulate_weights(buffers["scratch"]["edge_factors"], edge_vertices, weights)
+    elif update["linear"]:
+        compute_weights_linear(rest_data["coords"], rest_data["edge_directions"], buffers["deformed_coords"],
+                               edge_vertices, update["multiply"], weights, buffers["scratch"])
+    else:
+        compute_weights(rest_data["edge_lengths"], buffers["deformed_coords"],
+                        edge_vertices, update["multiply"], weights, buffers["scratch"])
+
+    # split the weights into stretch (positive) and squeeze (negative) values in a single pass
+    # clamping both between the minimum and the maximum sets the other one to the minimum
+    tension[:, 0] = weights
+    np.negative(weights, out=tension[:, 1])
+    np.minimum(tension, update["maximum"], out=tension)
+    np.maximum(tension, update["minimum"], out=tension)
+
+    # build 4D colors, using the stretch for red, the squeeze for green, 0 for blue and 1 for alpha
+    # vertex colors are stored by vertex loop, so use the vertex of every loop
+    if update["enable_vertex_colors"]:
+        buffers["colors"][:, :2] = tension[rest_data["loop_vertices"]]
+
+
+def tm_write(update):
+    """
+    Stores the tension map of an update computed by tm_compute in the object
+    This has to run on the main thread, like all accesses to bpy
+    :param update: the data of the update
+    :return: nothing
+    """
+    obj = update["object"]
+    mesh = obj.data
+    buffers = update["buffers"]
+    tension = buffers["tension"]
 
+    # store the new values in the vertex groups if the feature is active
     # check vertex groups and vertex colors existence, add them otherwise
-    if obj.data.tm_enable_vertex_groups:
+    if update["enable_vertex_groups"]:
         group_squeeze = get_or_create_vertex_group(obj, "tm_squeeze")
         group_stretch = get_or_create_vertex_group(obj, "tm_stretch")
+        set_vertex_groups_weights(obj, {group_stretch.index: tension[:, 0],
+                                        group_squeeze.index: tension[:, 1]})
+
+    # store the new values in the attributes if the feature is active
+    # unlike vertex groups, they are written in a single call each
+    # they can't have the same names as the vertex groups
+    # the columns are copied, as foreach_set only reads contiguous arrays directly
+    if update["enable_attributes"]:
+        get_or_create_attribute(obj, "tm_stretch_value").data.foreach_set("value", tension[:, 0].copy())
+        get_or_create_attribute(obj, "tm_squeeze_value").data.foreach_set("value", tension[:, 1].copy())
+
+    # store the new values in the vertex colors if the feature is active
+    if update["enable_vertex_colors"]:
+        colors_tension = get_or_create_vertex_colors(obj, "tm_tension")
+        colors_tension.data.foreach_set(vertex_colors_property, buffers["colors"].ravel())
 
-    # optimization
-    num_modifiers = len(obj.modifiers)
-    range_modifiers = range(num_modifiers)
-    num_vertices = len(obj.data.vertices)
-
-    # save modifier viewport show state
-    # temporarily hide modifiers to create a deformed mesh data
-    show_original_state = [False] * num_modifiers
-    for i in range_modifiers:
-        modifier = obj.modifiers[i]
-        show_original_state[i] = modifier.show_viewport
-
-        # if the modifier is not one we keep for the deformed mesh, hide it for now
-        # TODO: use a bool property on each modifier to determine if it should be kept
-        # it appears a property can't be added to the Modifier type
-        # another way will need to be found
-        if modifier.type not in kept_modifiers:
-            modifier.show_viewport = False
-
-    # this converts the object to a mesh
-    # as it is currently visible in the viewport
-    depsgraph = context.evaluated_depsgraph_get()
-    object_eval = obj.evaluated_get(depsgraph)
-    deformed_mesh = object_eval.to_mesh()
+    # foreach_set doesn't notify Blender of the change
+    if update["enable_vertex_colors"] or update["enable_attributes"]:
+        mesh.update_tag()
 
-    # restore modifiers viewport show state
-    for i in range_modifiers:
-        obj.modifiers[i].show_viewport = show_original_state[i]
 
-    # array to store new weight for each vertices
-    weights = [0.0] * num_vertices
+def tm_update_objects(objects, context, force=False):
+    """
+    Updates the tension map for the given objects
+    Blender is read from and written to on the main thread, but the tension maps
+    of several objects are computed in parallel when NumPy is used
+    :param objects: the objects to update
+    :param context: the context of the operation
+    :param force: whether to update the objects even if nothing changed since their last update
+    :return: nothing
+    """
+    global tm_executor
 
-    # calculate the new weights
-    for i in range(len(obj.data.edges)):
-        edge = obj.data.edges[i]
-        first_vertex = edge.vertices[0]
-        second_vertex = edge.vertices[1]
+    # objects sharing a mesh would share its buffers, and only the last one written is kept anyway
+    objects = {obj.data.as_pointer(): obj for obj in objects if obj.type == "MESH"}.values()
+    updates = [tm_read(obj, context, force) for obj in objects]
+    updates = [update for update in updates if update is not None]
 
-        original_edge_length = (obj.data.vertices[first_vertex].co -
-                                obj.data.vertices[second_vertex].co).length
-        deformed_edge_length = (
-            deformed_mesh.vertices[first_vertex].co - deformed_mesh.vertices[second_vertex].co).length
+    # NumPy releases the GIL during its operations, so threads can run at the same time
+    # the numba kernel already uses all the cores, and can't be launched from several threads at once
+    if numba is None and len(updates) > 1:
+        if tm_executor is None:
+            tm_executor = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count())
+        # list() waits for all of them and raises their exceptions here
+        list(tm_executor.map(tm_compute, updates))
+    else:
+        for update in updates:
+            tm_compute(update)
 
-        deformation_factor = (original_edge_length -
-                              deformed_edge_length) * obj.data.tm_multiply
+    for update in updates:
+        tm_write(update)
 
-        # store the weights by subtracting to overlay all the factors for each vertex
-        weights[first_vertex] -= deformation_factor
-        weights[second_vertex] -= deformation_factor
 
-    # delete the temporary deformed mesh
-    object_eval.to_mesh_clear()
-
-    # create vertex color list for faster access only if vertex color is activated
-    if obj.data.tm_enable_vertex_colors:
-        vertex_colors = [0.0] * (number_of_tm_channels * num_vertices)
-
-    # calculate the new values
-    # store them in the vertex_colors array if the feature is active
-    # store them in the vertex groups if the feature is active
-    for i in range(num_vertices):
-        stretch_value = obj.data.tm_minimum
-        squeeze_value = obj.data.tm_minimum
-
-        if weights[i] >= 0:
-            # positive: stretched
-            stretch_value = max(obj.data.tm_minimum, min(
-                obj.data.tm_maximum, weights[i]))
-        else:
-            # negative: squeezed
-            # invert weights to keep only positive values
-            squeeze_value = max(obj.data.tm_minimum, min(
-                obj.data.tm_maximum, -weights[i]))
-
-        if obj.data.tm_enable_vertex_groups:
-            add_index = [i]
-            group_squeeze.add(add_index, squeeze_value, "REPLACE")
-            group_stretch.add(add_index, stretch_value, "REPLACE")
-
-        if obj.data.tm_enable_vertex_colors:
-            # red
-            vertex_colors[i * number_of_tm_channels] = stretch_value
-            # green
-            vertex_colors[i * number_of_tm_channels + 1] = squeeze_value
-
-    # store the calculated vertex colors if the feature is active
-    if obj.data.tm_enable_vertex_colors:
-        colors_tension = get_or_create_vertex_colors(obj, "tm_tension")
-        # this is heavy, but vertex colors are stored by vertex loop
-        # and there is no simpler way to do it (it would seem)
-        for poly_idx in range(len(obj.data.polygons)):
-            polygon = obj.data.polygons[poly_idx]
-            for loop_vertex_idx, loop_idx in enumerate(polygon.loop_indices):
-                vertex_color = colors_tension.data[loop_idx]
-                vertex_idx = polygon.vertices[loop_vertex_idx]
-                # replace the color by a 4D vector, using 0 for blue and 1 for alpha
-                vertex_color.color = (vertex_colors[vertex_idx * number_of_tm_channels],
-                                      vertex_colors[vertex_idx * number_of_tm_channels + 1], 0, 1)
+def tm_update(obj, context, force=False):
+    """
+    Updates the tension map for the given object
+    :param obj: the object to update
+    :param context: the context of the operation
+    :param force: whether to update the object even if nothing changed since its last update
+    :return: nothing
+    """
+    tm_update_objects([obj], context, force)
 
 
+def get_tm_active_objects(scene):
+    """
+    Gets the objects of the scene that have tension map activated
+    Their names are cached, the scene is only scanned again when objects were added, removed or renamed
+    :param scene: the scene to get the objects from
+    :return: the list of objects with tension map activated
+    """
+    global tm_active_objects, tm_active_objects_signature
+
+    signature = (scene.as_pointer(), len(scene.objects))
+    if tm_active_objects is None or tm_active_objects_signature != signature:
+        tm_active_objects = {obj.name for obj in scene.objects
+                             if obj.type == "MESH" and obj.data.tm_active}
+        tm_active_objects_signature = signature
+
+    objects = []
+    for name in tm_active_objects:
+        obj = scene.objects.get(name)
+        if obj is None:
+            # the object has been renamed, scan the scene again next time
+            tm_active_objects = None
+            continue
+        objects.append(obj)
+    return objects
+
+
+def get_tm_objects_to_update(scene):
+    """
+    Gets the objects of the scene that have tension map activated and can change when playing
+    :param scene: the scene to get the objects from
+    :return: the list of objects to update
+    """
+    # hidden objects don't need to be updated, visible_get also covers the objects hidden in the viewport
+    # meshes without edges can't deform, their tension map never changes
+    return [obj for obj in get_tm_active_objects(scene) if obj.visible_get() and len(obj.data.edges) > 0]
+
+
+@bpy.app.handlers.persistent
 def tm_update_handler(scene):
     """
     Updates the tension map for all objects in the scene
@@ -208,14 +833,95 @@ def tm_update_handler(scene):
     global last_processed_frame
 
     # avoid executing the operations if the frame hasn't really changed
-    if last_processed_frame == scene.frame_current:
+    # the subframe is part of it, as motion blur evaluates several subframes per frame
+    frame = (scene.frame_current, scene.frame_subframe)
+    if last_processed_frame == frame:
         return
 
-    last_processed_frame = scene.frame_current
+    last_processed_frame = frame
+
+    tm_update_objects(get_tm_objects_to_update(scene), bpy.context)
 
-    # TODO: store tm objects in a special array to avoid looping over all objects in the scene
-    for obj in scene.objects:
-        tm_update(obj, bpy.context)
+
+@bpy.app.handlers.persistent
+def tm_depsgraph_update_handler(scene, depsgraph=None):
+    """
+    Updates the tension map for the objects in the scene when another object changed,
+    for example when posing an armature without changing frame
+    This function will be called by Blender after every depsgraph update
+    :param scene: the scene to operate on
+    :param depsgraph: the depsgraph that was updated, only given by Blender 2.81 and later
+    :return: nothing
+    """
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+
+    # only changes to objects can deform a mesh
+    if not depsgraph.id_type_updated("OBJECT"):
+        return
+
+    objects = get_tm_objects_to_update(scene)
+    if not objects:
+        return
+
+    # updating the tension map changes the object and its mesh, which triggers a new depsgraph update
+    # only update when some other object changed, otherwise this would never stop
+    own_ids = {obj.as_pointer() for obj in objects}
+    own_ids.update(obj.data.as_pointer() for obj in objects)
+    if not any(isinstance(update.id, bpy.types.Object) and update.id.original.as_pointer() not in own_ids
+               for update in depsgraph.updates):
+        return
+
+    # only the objects whose geometry was evaluated again can have been deformed
+    updated_geometry = {update.id.original.as_pointer() for update in depsgraph.updates
+                        if isinstance(update.id, bpy.types.Object) and update.is_updated_geometry}
+    tm_update_objects([obj for obj in objects if obj.as_pointer() in updated_geometry], bpy.context)
+
+
+@bpy.app.handlers.persistent
+def tm_load_handler(dummy):
+    """
+    Forgets the objects with tension map activated and the cached mesh data when a file is loaded,
+    so that they are found again from the scene of the new file
+    This function will be called by Blender after loading a file
+    :param dummy: unused argument given by Blender
+    :return: nothing
+    """
+    global tm_active_objects, last_processed_frame
+
+    tm_active_objects = None
+    # the new file might be on the same frame, and still needs to be updated
+    last_processed_frame = None
+    # the meshes of the previous file are gone
+    rest_data_per_mesh.clear()
+    buffers_per_mesh.clear()
+
+
+@bpy.app.handlers.persistent
+def tm_undo_handler(dummy):
+    """
+    Forgets the objects with tension map activated after an undo or a redo,
+    as it restores tm_active without calling its update function
+    This function will be called by Blender after undoing or redoing a step
+    :param dummy: unused argument given by Blender
+    :return: nothing
+    """
+    global tm_active_objects
+
+    tm_active_objects = None
+
+
+def tm_active_update(self, context):
+    """
+    Called when tension map is activated or deactivated on a mesh
+    :param context: the context in which the selected object is
+    :return: nothing
+    """
+    global tm_active_objects
+
+    # the active objects will be found again from the scene next frame
+    tm_active_objects = None
+    tm_update_selected(self, context)
 
 
 def tm_update_selected(self, context):
@@ -224,7 +930,10 @@ def tm_update_selected(self, context):
     :param context: the context in which the selected object is
     :return: nothing
     """
-    tm_update(context.object, context)
+    # always update when asked by the user, for example to recreate outputs that were removed
+    # the frame isn't marked as processed, as the other objects may still need it
+    # the frame handler skips this object anyway, its coordinates and settings being unchanged
+    tm_update(context.object, context, force=True)
 
 
 class TmUpdateSelected(bpy.types.Operator):
@@ -243,6 +952,35 @@ class TmUpdateSelected(bpy.types.Operator):
         return self.execute(context)
 
 
+class TmAttributesToVertexGroups(bpy.types.Operator):
+    """Copy the tension attributes of the selected object to its tension vertex groups"""
+
+    # this lets the attributes be used where only vertex groups are supported, without updating both every frame
+    bl_label = "Attributes to Vertex Groups"
+    bl_idname = "tm.attributes_to_vertex_groups"
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context):
+        # the operator can also be run from the search menu, where the button's conditions don't apply
+        return use_attributes and context.object is not None and context.object.type == "MESH"
+
+    def execute(self, context):
+        obj = context.object
+        attributes = obj.data.attributes
+        if "tm_stretch_value" not in attributes or "tm_squeeze_value" not in attributes:
+            self.report({"ERROR"}, "The tension attributes don't exist, enable attributes first")
+            return {"CANCELLED"}
+
+        weights_per_group = {}
+        for attribute_name, group_name in (("tm_stretch_value", "tm_stretch"), ("tm_squeeze_value", "tm_squeeze")):
+            weights = get_array(attributes[attribute_name].data, "value", dtype=np.float32)
+            weights_per_group[get_or_create_vertex_group(obj, group_name).index] = weights
+
+        set_vertex_groups_weights(obj, weights_per_group)
+        return {"FINISHED"}
+
+
 class TmPanel(bpy.types.Panel):
     """Creates a Panel in the Object properties window"""
 
@@ -272,9 +1010,14 @@ class TmPanel(bpy.types.Panel):
                   text="Enable Vertex Groups")
         row1.prop(context.object.data, "tm_enable_vertex_colors",
                   text="Enable Vertex Colors")
+        if use_attributes:
+            row1.prop(context.object.data, "tm_enable_attributes",
+                      text="Enable Attributes")
+            row1.operator("tm.attributes_to_vertex_groups")
         row1.prop(context.object.data, "tm_multiply", text="Multiplier")
         row1.prop(context.object.data, "tm_minimum", text="Minimum")
         row1.prop(context.object.data, "tm_maximum", text="Maximum")
+        row1.prop(context.object.data, "tm_linear", text="Linear Approximation")
 
         '''
         # TODO: finish implementing interface for choosing modifiers
@@ -302,7 +1045,7 @@ def add_props():
         name="tm_active",
         description="Activate tension map on this mesh",
         default=False,
-        update=tm_update_selected)
+        update=tm_active_update)
     bpy.types.Mesh.tm_multiply = bpy.props.FloatProperty(
         name="tm_multiply",
         description="Tension map intensity multiplier",
@@ -324,6 +1067,11 @@ def add_props():
         max=1.0,
         default=1.0,
         update=tm_update_selected)
+    bpy.types.Mesh.tm_linear = bpy.props.BoolProperty(
+        name="tm_linear",
+        description="Approximate the tension, faster but only accurate for small deformations",
+        default=False,
+        update=tm_update_selected)
     bpy.types.Mesh.tm_enable_vertex_groups = bpy.props.BoolProperty(
         name="tm_enable_vertex_groups",
         description="Whether to enable vertex groups",
@@ -334,6 +1082,11 @@ def add_props():
         description="Whether to enable vertex colors",
         default=False,
         update=tm_update_selected)
+    bpy.types.Mesh.tm_enable_attributes = bpy.props.BoolProperty(
+        name="tm_enable_attributes",
+        description="Whether to enable float attributes, faster to update than vertex groups",
+        default=False,
+        update=tm_update_selected)
 
 
 def remove_props():
@@ -345,8 +1098,10 @@ def remove_props():
     del bpy.types.Mesh.tm_multiply
     del bpy.types.Mesh.tm_minimum
     del bpy.types.Mesh.tm_maximum
+    del bpy.types.Mesh.tm_linear
     del bpy.types.Mesh.tm_enable_vertex_groups
     del bpy.types.Mesh.tm_enable_vertex_colors
+    del bpy.types.Mesh.tm_enable_attributes
 
 
 def add_handlers():
@@ -354,8 +1109,11 @@ def add_handlers():
     Method responsible for adding the handlers for the tm_update_all method
     :return: nothing
     """
-    bpy.app.handlers.persistent(tm_update_handler)
     bpy.app.handlers.frame_change_post.append(tm_update_handler)
+    bpy.app.handlers.depsgraph_update_post.append(tm_depsgraph_update_handler)
+    bpy.app.handlers.load_post.append(tm_load_handler)
+    bpy.app.handlers.undo_post.append(tm_undo_handler)
+    bpy.app.handlers.redo_post.append(tm_undo_handler)
 
 
 def remove_handlers():
@@ -363,6 +1121,10 @@ def remove_handlers():
     Method responsible for removing the handlers for the tm_update_all method
     :return: nothing
     """
+    bpy.app.handlers.redo_post.remove(tm_undo_handler)
+    bpy.app.handlers.undo_post.remove(tm_undo_handler)
+    bpy.app.handlers.load_post.remove(tm_load_handler)
+    bpy.app.handlers.depsgraph_update_post.remove(tm_depsgraph_update_handler)
     bpy.app.handlers.frame_change_post.remove(tm_update_handler)
 
 
@@ -373,6 +1135,7 @@ def register():
     """
     add_props()
     bpy.utils.register_class(TmUpdateSelected)
+    bpy.utils.register_class(TmAttributesToVertexGroups)
     bpy.utils.register_class(TmPanel)
     add_handlers()
 
@@ -382,8 +1145,16 @@ def unregister():
     Method called by Blender when disabling or removing the add-on
     :return: nothing
     """
+    global tm_executor
+
     remove_handlers()
+    if tm_executor is not None:
+        tm_executor.shutdown()
+        tm_executor = None
+    rest_data_per_mesh.clear()
+    buffers_per_mesh.clear()
     bpy.utils.unregister_class(TmPanel)
+    bpy.utils.unregister_class(TmAttributesToVertexGroups)
     bpy.utils.unregister_class(TmUpdateSelected)
     remove_props()
 